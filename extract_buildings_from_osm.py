@@ -1,12 +1,9 @@
-import osmnx as ox
-import geopandas as gpd
-import pandas as pd
+import pyogrio
 
 def from_osm_to_gdf(osm_path, output_path):
-    buildings = ox.features_from_xml(osm_path)
-    tf = buildings.reset_index()
-    df_buildings = tf[(tf["element"] == "way") & (tf["building"].notna())]
-    builff = df_buildings[["building", "geometry"]].reset_index(drop=True)
-    gdf_buildings = gpd.GeoDataFrame(builff, geometry="geometry", crs="EPSG:4326")
-    builff.to_csv(output_path, index=False)
-    return builff
+    buildings = pyogrio.read_dataframe(osm_path, layer="multipolygons", use_arrow=True,
+                                       columns=["osm_way_id", "building"])
+    df_buildings = buildings[(buildings["osm_way_id"].notna()) & (buildings["building"].notna())]
+    gdf_buildings = df_buildings[["building", "geometry"]].explode(index_parts=False).reset_index(drop=True)
+    gdf_buildings.to_parquet(output_path, index=False)
+    return gdf_buildings
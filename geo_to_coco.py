@@ -1,18 +1,95 @@
 import rasterio
+from rasterio.coords import BoundingBox
+from rasterio.warp import transform_bounds
 import pandas as pd
+import geopandas as gpd
 import numpy as np
+import shapely
 from shapely.geometry import Point, Polygon
-from shapely.wkt import loads
 import pyproj
 from pyproj import Transformer
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from datetime import datetime
 import cv2
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
 from PIL import Image, ImageDraw
 import os
 import glob
 import argparse
 import sys
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+@functools.lru_cache(maxsize=None)
+def _make_transformer(crs_wkt):
+    """Build (once per CRS) a transformer from EPSG:4326 to the CRS given as WKT"""
+    return Transformer.from_crs("EPSG:4326", crs_wkt, always_xy=True)
+
+def _dumps(obj):
+    """Serialize obj to compact JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj).encode()
+
+class AnnotationWriter:
+    """Stream a COCO dataset to disk one annotation at a time
+
+    The annotations array is opened on enter and each annotation is appended
+    as it comes. The header (everything in coco_format except annotations) is
+    written on exit, after the annotations, so image entries may still change
+    while the block runs (e.g. TIFF to JPG renames). Data goes to a temporary
+    file that only replaces output_path once the block exits without an error,
+    so a failed run never leaves a truncated dataset.
+    """
+    def __init__(self, output_path, coco_format):
+        self.output_path = output_path
+        self.tmp_path = output_path + '.tmp'
+        self.coco_format = coco_format
+        self.count = 0
+
+    def __enter__(self):
+        self.f = open(self.tmp_path, 'wb')
+        self.f.write(b'{"annotations":[')
+        return self
+
+    def write(self, annotation):
+        """Append an annotation"""
+        if self.count:
+            self.f.write(b',')
+        self.f.write(_dumps(annotation))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            header = {key: value for key, value in self.coco_format.items() if key != 'annotations'}
+            # Close the annotations array and append the header keys to the same object
+            self.f.write(b'],' + _dumps(header)[1:])
+            self.f.close()
+            os.replace(self.tmp_path, self.output_path)
+        else:
+            self.f.close()
+            os.remove(self.tmp_path)
+
+# Converter shared with worker processes, set once per worker by _init_worker
+_worker_converter = None
+
+def _init_worker(converter):
+    """Store the converter in the worker process so each task only pickles its image info"""
+    global _worker_converter
+    _worker_converter = converter
+
+def _filter_valid_polygons_worker(image_info):
+    """Filter polygons for one image inside a worker process"""
+    return _worker_converter.filter_valid_polygons_for_image(image_info)
 
 class GeoTiffToCoco:
     def __init__(self, images_folder_path, csv_path, min_area = 10):
@@ -22,22 +99,31 @@ class GeoTiffToCoco:
         self.image_size = 640  # Fixed size for all images
         self.image_info = {}
         self.categories = {}
-        self.annotations = []
-        self.annotation_mapping = []  # New list to store mapping information
+        now = datetime.now()
         self.coco_format = {
             "info": {
                 "description": "Dataset for buildings type of Morocco",
                 "version": "1.0",
-                "year": datetime.now().year,
+                "year": now.year,
                 "contributor": "TFERHAN",
-                "date_created": datetime.now().isoformat()
+                "date_created": now.isoformat()
             },
             "licenses": [],
             "images": [],
-            "annotations": [],
             "categories": []
         }
 
+    def __getstate__(self):
+        # The spatial index is rebuilt on unpickling instead of being sent to workers
+        state = self.__dict__.copy()
+        state.pop('sindex', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'gdf' in state:
+            self.sindex = self.gdf.sindex
+
     def load_images(self):
         """Load all images from the folder and get their information"""
         # Get all image files (common formats)
@@ -52,56 +138,84 @@ class GeoTiffToCoco:
 
         print(f"Found {len(self.image_files)} images in folder")
 
-        # Load each image and get its geospatial information
+        # Load each image and get its geospatial information, reading files concurrently
+        # (GDAL releases the GIL so the opens overlap disk latency)
         self.images_info = []
-        for idx, image_path in enumerate(self.image_files):
-            try:
-                with rasterio.open(image_path) as src:
-                    image_info = {
-                        'id': idx + 1,
-                        'path': image_path,
-                        'filename': os.path.basename(image_path),
-                        'width': src.width,
-                        'height': src.height,
-                        'crs': src.crs,
-                        'transform': src.transform,
-                        'bounds': src.bounds
-                    }
-                    self.images_info.append(image_info)
-
-                    # Add to COCO format
-                    coco_image_info = {
-                        "id": idx + 1,
-                        "width": src.width,
-                        "height": src.height,
-                        "file_name": os.path.basename(image_path),
-                        "license": 1,
-                        "date_captured": datetime.now().isoformat()
-                    }
-                    self.coco_format["images"].append(coco_image_info)
-
-            except Exception as e:
-                print(f"Error loading image {image_path}: {e}")
-                continue
+        date_captured = datetime.now().isoformat()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = [executor.submit(self.read_image_metadata, image_path) for image_path in self.image_files]
+
+            for idx, (image_path, future) in enumerate(zip(self.image_files, futures)):
+                try:
+                    metadata = future.result()
+                except Exception as e:
+                    print(f"Error loading image {image_path}: {e}")
+                    continue
+
+                image_info = {
+                    'id': idx + 1,
+                    'path': image_path,
+                    'filename': os.path.basename(image_path),
+                    **metadata
+                }
+                self.images_info.append(image_info)
+
+                # Add to COCO format
+                coco_image_info = {
+                    "id": idx + 1,
+                    "width": metadata['width'],
+                    "height": metadata['height'],
+                    "file_name": os.path.basename(image_path),
+                    "license": 1,
+                    "date_captured": date_captured
+                }
+                self.coco_format["images"].append(coco_image_info)
 
         print(f"Successfully loaded {len(self.images_info)} images")
 
+    def read_image_metadata(self, image_path):
+        """Read size and geospatial information of an image"""
+        with rasterio.open(image_path) as src:
+            return {
+                'width': src.width,
+                'height': src.height,
+                'crs': src.crs,
+                'transform': src.transform,
+                'bounds': src.bounds
+            }
+
     def load_csv(self):
-        """Load the CSV file with building data"""
-        self.df = pd.read_csv(self.csv_path)
+        """Load the CSV (or GeoParquet/Feather) file with building data"""
+        # GeoParquet/Feather files store binary geometries, no WKT parsing needed
+        geo_file = self.csv_path.lower().endswith(('.parquet', '.feather'))
+        if geo_file:
+            read_geo_file = gpd.read_parquet if self.csv_path.lower().endswith('.parquet') else gpd.read_feather
+            gdf = read_geo_file(self.csv_path)
+            # Building polygons are matched against images in EPSG:4326
+            gdf = gdf.set_crs('EPSG:4326') if gdf.crs is None else gdf.to_crs('EPSG:4326')
+            df = pd.DataFrame(gdf)
+        else:
+            df = pd.read_csv(self.csv_path)
 
-        if 'building' not in self.df.columns or 'geometry' not in self.df.columns:
+        if 'building' not in df.columns or 'geometry' not in df.columns:
             raise ValueError("CSV must contain 'building' and 'geometry' columns")
 
-        # Convert WKT strings to shapely geometries
-        self.df['geometry'] = self.df['geometry'].apply(lambda wkt: loads(wkt) if isinstance(wkt, str) else wkt)
+        if not geo_file:
+            # Convert WKT strings to shapely geometries (missing values become None)
+            wkt = df['geometry'].to_numpy(dtype=object)
+            wkt[pd.isna(wkt)] = None
+            df['geometry'] = shapely.from_wkt(wkt)
+
+        # Filter valid geometries (keep polygons only)
+        valid_mask = shapely.get_type_id(df['geometry'].to_numpy()) == shapely.GeometryType.POLYGON
+        df = df[valid_mask].reset_index(drop=True)
 
-        # Filter valid geometries
-        valid_mask = self.df['geometry'].apply(lambda geom: geom is not None and hasattr(geom, 'exterior'))
-        self.df = self.df[valid_mask].reset_index(drop=True)
+        # Keep a single polygon table, with a spatial index used to find candidates per image
+        self.gdf = gpd.GeoDataFrame(df, geometry='geometry', crs='EPSG:4326')
+        self.sindex = self.gdf.sindex
 
         # Create categories
-        unique_types = self.df['building'].unique()
+        unique_types = self.gdf['building'].unique()
         self.categories = {building_type: idx + 1 for idx, building_type in enumerate(unique_types)}
 
         # Add categories to COCO format
@@ -113,113 +227,117 @@ class GeoTiffToCoco:
             }
             self.coco_format["categories"].append(category_info)
 
-        print(f"Found {len(self.df)} polygons with {len(unique_types)} building types")
+        print(f"Found {len(self.gdf)} polygons with {len(unique_types)} building types")
         print(f"Building types: {list(unique_types)}")
 
     def setup_coordinate_transformer(self, source_crs):
         """Setup coordinate transformer for a specific CRS"""
         if source_crs.to_epsg() != 4326:
-            return Transformer.from_crs("EPSG:4326", source_crs, always_xy=True)
+            # Build from the full WKT: to_epsg() may match a CRS with a different datum
+            return _make_transformer(source_crs.to_wkt())
         else:
             return None
 
-    def geographic_to_pixel(self, lon, lat, transform, transformer=None):
-        """Convert geographic coordinates to pixel coordinates"""
-        if transformer:
-            x, y = transformer.transform(lon, lat)
-        else:
-            x, y = lon, lat
-
-        col = int((x - transform.c) / transform.a)
-        row = int((y - transform.f) / transform.e)
-
-        return col, row
+    def polygon_to_pixel_coords(self, polygons, transform, transformer=None):
+        """Convert the exterior rings of a batch of polygons to pixel coordinates
 
-    def polygon_to_pixel_coords(self, polygon, transform, transformer=None):
-        """Convert polygon coordinates to pixel coordinates"""
-        pixel_coords = []
+        Returns an (N, 2) int32 array with the vertices of every polygon stacked
+        together, and an offsets array such that the vertices of polygon i are
+        pixel_coords[offsets[i]:offsets[i + 1]].
+        """
+        exteriors = shapely.get_exterior_ring(polygons)
+        coords, index = shapely.get_coordinates(exteriors, return_index=True)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(index, minlength=len(polygons)))])
 
-        exterior_coords = list(polygon.exterior.coords)
-        for lon, lat in exterior_coords:
-            col, row = self.geographic_to_pixel(lon, lat, transform, transformer)
-            pixel_coords.append([col, row])
-
-        return pixel_coords
-
-    def get_bbox_from_coords(self, coords):
-        """Get bounding box from coordinates"""
-        coords_array = np.array(coords)
-        x_min, y_min = coords_array.min(axis=0)
-        x_max, y_max = coords_array.max(axis=0)
+        if transformer:
+            xs, ys = transformer.transform(coords[:, 0], coords[:, 1])
+        else:
+            xs, ys = coords[:, 0], coords[:, 1]
 
-        width = x_max - x_min
-        height = y_max - y_min
+        cols = ((np.asarray(xs) - transform.c) / transform.a).astype(np.int32)
+        rows = ((np.asarray(ys) - transform.f) / transform.e).astype(np.int32)
 
-        return [int(x_min), int(y_min), int(width), int(height)]
+        return np.column_stack([cols, rows]), offsets
 
     def get_segmentation_from_coords(self, coords):
         """Get segmentation format from coordinates"""
-        segmentation = []
-        for coord in coords:
-            segmentation.extend(coord)
-
-        return [segmentation]
+        return [np.asarray(coords).reshape(-1).tolist()]
 
-    def calculate_area(self, coords):
-        """Calculate area of polygon"""
-        coords_array = np.array(coords)
-        x = coords_array[:, 0]
-        y = coords_array[:, 1]
+    def image_bounds_to_wgs84(self, image_info):
+        """Get image bounds in EPSG:4326, the CRS of the building polygons"""
+        bounds = image_info['bounds']
+        if image_info['crs'].to_epsg() == 4326:
+            return bounds
 
-        area = 0.5 * abs(sum(x[i] * y[i+1] - x[i+1] * y[i] for i in range(-1, len(x)-1)))
-        return area
+        return BoundingBox(*transform_bounds(image_info['crs'], 'EPSG:4326', *bounds))
 
-    def polygon_intersects_image(self, polygon, image_bounds):
-        """Check if polygon intersects with image bounds"""
-        # Create a polygon from image bounds
-        image_poly = Polygon([
+    def image_bounds_polygon(self, image_bounds):
+        """Create a polygon from image bounds"""
+        return Polygon([
             (image_bounds.left, image_bounds.bottom),
             (image_bounds.right, image_bounds.bottom),
             (image_bounds.right, image_bounds.top),
             (image_bounds.left, image_bounds.top)
         ])
 
-        return polygon.intersects(image_poly)
-
     def filter_valid_polygons_for_image(self, image_info):
         """Filter polygons that are valid for a specific image"""
         valid_polygons = []
         transformer = self.setup_coordinate_transformer(image_info['crs'])
 
-        for idx, row in self.df.iterrows():
-            polygon = row['geometry']
-
-            # Check if polygon intersects with image bounds
-            if not self.polygon_intersects_image(polygon, image_info['bounds']):
-                continue
-
-            # Convert to pixel coordinates
-            pixel_coords = self.polygon_to_pixel_coords(polygon, image_info['transform'], transformer)
-
-            coords_array = np.array(pixel_coords)
-
-            # Check if polygon is within image bounds
-            if (coords_array[:, 0].max() < 0 or coords_array[:, 0].min() > image_info['width'] or
-                coords_array[:, 1].max() < 0 or coords_array[:, 1].min() > image_info['height']):
-                continue
-
-            # Clip coordinates to image bounds
-            coords_array[:, 0] = np.clip(coords_array[:, 0], 0, image_info['width'])
-            coords_array[:, 1] = np.clip(coords_array[:, 1], 0, image_info['height'])
-
-            # Calculate area and filter small polygons
-            area = self.calculate_area(coords_array)
-            if area > self.min_area:
-                valid_polygons.append({
-                    'building': row['building'],
-                    'coords': coords_array.tolist(),
-                    'original_idx': idx
-                })
+        # Query the spatial index for candidate polygons around the image
+        image_poly = self.image_bounds_polygon(self.image_bounds_to_wgs84(image_info))
+        candidate_idx = np.sort(self.sindex.query(image_poly))
+
+        # Keep only candidates that intersect with image bounds, testing them all
+        # at once against the prepared image polygon (shapely only uses the
+        # prepared geometry when it is the first argument)
+        shapely.prepare(image_poly)
+        candidates = self.gdf['geometry'].to_numpy()[candidate_idx]
+        intersects_mask = shapely.intersects(image_poly, candidates)
+        intersecting_idx = self.gdf.index[candidate_idx[intersects_mask]].tolist()
+        if not intersecting_idx:
+            return valid_polygons
+
+        # Convert all intersecting polygons to pixel coordinates at once
+        polygons = candidates[intersects_mask]
+        pixel_coords, offsets = self.polygon_to_pixel_coords(polygons, image_info['transform'], transformer)
+
+        # Reject polygons that fall outside the image, for all polygons at once
+        width, height = image_info['width'], image_info['height']
+        mins = np.minimum.reduceat(pixel_coords, offsets[:-1], axis=0)
+        maxs = np.maximum.reduceat(pixel_coords, offsets[:-1], axis=0)
+        keep = ~((maxs[:, 0] < 0) | (mins[:, 0] > width) | (maxs[:, 1] < 0) | (mins[:, 1] > height))
+
+        # Clip coordinates to image bounds
+        np.clip(pixel_coords[:, 0], 0, width, out=pixel_coords[:, 0])
+        np.clip(pixel_coords[:, 1], 0, height, out=pixel_coords[:, 1])
+
+        kept = np.flatnonzero(keep)
+        if kept.size == 0:
+            return valid_polygons
+
+        lengths = np.diff(offsets)[kept]
+        kept_coords = pixel_coords[np.repeat(keep, np.diff(offsets))]
+        kept_offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        # Build the pixel space polygons to get areas and bounds in single GEOS calls
+        rings = shapely.linearrings(kept_coords.astype(np.float64), indices=np.repeat(np.arange(kept.size), lengths))
+        pixel_polygons = shapely.polygons(rings)
+        areas = shapely.area(pixel_polygons)
+        bounds = shapely.bounds(pixel_polygons)
+        bboxes = np.column_stack([bounds[:, :2], bounds[:, 2:] - bounds[:, :2]]).astype(np.int32)
+
+        # Filter small polygons
+        for j in np.flatnonzero(areas > self.min_area):
+            idx = intersecting_idx[kept[j]]
+            valid_polygons.append({
+                'building': self.gdf.at[idx, 'building'],
+                'coords': kept_coords[kept_offsets[j]:kept_offsets[j + 1]],
+                'area': areas[j],
+                'bbox': bboxes[j].tolist(),
+                'original_idx': idx
+            })
 
         return valid_polygons
 
@@ -229,14 +347,27 @@ class GeoTiffToCoco:
             # Create JPG filename
             jpg_path = tiff_path.rsplit('.', 1)[0] + '.jpg'
 
-            # Open and convert TIFF to JPG
-            with Image.open(tiff_path) as img:
-                # Convert to RGB if necessary (TIFF might be in different modes)
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                # Save as JPG with specified quality
-                img.save(jpg_path, 'JPEG', quality=quality, optimize=True)
+            if pyvips is not None:
+                # Stream the TIFF row by row through libvips (libjpeg-turbo encoder)
+                img = pyvips.Image.new_from_file(tiff_path, access='sequential')
+                if img.bands > 3:
+                    img = img.extract_band(0, n=3)
+                img.write_to_file(jpg_path, Q=quality, strip=True, optimize_coding=True)
+            else:
+                # OpenCV decodes straight to 8-bit BGR, the layout its JPEG encoder expects
+                img = cv2.imread(tiff_path, cv2.IMREAD_COLOR)
+                if img is not None:
+                    if not cv2.imwrite(jpg_path, img, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1]):
+                        raise IOError(f"OpenCV could not write {jpg_path}")
+                else:
+                    # Fall back to PIL for TIFF variants OpenCV cannot decode
+                    with Image.open(tiff_path) as img:
+                        # Convert to RGB if necessary (TIFF might be in different modes)
+                        if img.mode != 'RGB':
+                            img = img.convert('RGB')
+
+                        # Save as JPG with specified quality
+                        img.save(jpg_path, 'JPEG', quality=quality, optimize=True)
 
             print(f"  Converted: {os.path.basename(tiff_path)} -> {os.path.basename(jpg_path)}")
             return jpg_path
@@ -246,57 +377,89 @@ class GeoTiffToCoco:
             return None
 
     def convert_all_tiff_to_jpg(self, quality=100):
-        """Convert all TIFF images to JPG and update COCO dataset paths"""
+        """Convert all TIFF images to JPG, update COCO dataset paths and return old_path -> new_path"""
         print("\nConverting TIFF images to JPG...")
 
         conversions = {}  # Track old_path -> new_path mappings
+        images_info_by_filename = {img_info['filename']: img_info for img_info in self.images_info}
 
+        # Collect TIFF files to convert
+        tasks = []
         for i, image_info in enumerate(self.coco_format["images"]):
             file_name = image_info["file_name"]
 
             # Check if it's a TIFF file
-            if file_name.lower().endswith(('.tif', '.tiff')):
-                # Get full path
-                full_path = None
-                for img_info in self.images_info:
-                    if img_info['filename'] == file_name:
-                        full_path = img_info['path']
-                        break
-
-                if full_path:
-                    # Convert TIFF to JPG
-                    jpg_path = self.convert_tiff_to_jpg(full_path, quality)
-
-                    if jpg_path:
-                        # Update filename in COCO format
-                        new_filename = os.path.basename(jpg_path)
-                        self.coco_format["images"][i]["file_name"] = new_filename
-                        conversions[full_path] = jpg_path
-
-                        # Update images_info as well
-                        for img_info in self.images_info:
-                            if img_info['path'] == full_path:
-                                img_info['path'] = jpg_path
-                                img_info['filename'] = new_filename
-                                break
+            if file_name.lower().endswith(('.tif', '.tiff')) and file_name in images_info_by_filename:
+                tasks.append((i, images_info_by_filename[file_name]))
+
+        # Convert TIFF files to JPG in parallel (the encoders release the GIL). OpenCV's
+        # log level is lowered meanwhile, otherwise libtiff warns about every GeoTIFF tag
+        # it does not know (33550, 33922, 34735, ...) for each file
+        log_level = cv2.utils.logging.getLogLevel()
+        cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_ERROR)
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                jpg_paths = list(executor.map(lambda task: self.convert_tiff_to_jpg(task[1]['path'], quality), tasks))
+        finally:
+            cv2.utils.logging.setLogLevel(log_level)
+
+        for (i, img_info), jpg_path in zip(tasks, jpg_paths):
+            if jpg_path:
+                # Update filename in COCO format
+                new_filename = os.path.basename(jpg_path)
+                self.coco_format["images"][i]["file_name"] = new_filename
+                conversions[img_info['path']] = jpg_path
+
+                # Update images_info as well
+                img_info['path'] = jpg_path
+                img_info['filename'] = new_filename
 
         if conversions:
             print(f"Successfully converted {len(conversions)} TIFF images to JPG")
-
-            # Optionally delete original TIFF files
-            delete_originals = input("Delete original TIFF files? (y/n): ").lower().strip()
-            if delete_originals == 'y':
-                for tiff_path in conversions.keys():
-                    try:
-                        os.remove(tiff_path)
-                        print(f"  Deleted: {os.path.basename(tiff_path)}")
-                    except Exception as e:
-                        print(f"  Error deleting {tiff_path}: {e}")
         else:
             print("No TIFF files found to convert")
 
-    def create_coco_dataset(self, output_path, convert_tiff_to_jpg=True, jpg_quality=100):
-        """Create the complete COCO dataset"""
+        return conversions
+
+    def delete_original_tiffs(self, conversions):
+        """Optionally delete original TIFF files after conversion"""
+        delete_originals = input("Delete original TIFF files? (y/n): ").lower().strip()
+        if delete_originals == 'y':
+            for tiff_path in conversions.keys():
+                try:
+                    os.remove(tiff_path)
+                    print(f"  Deleted: {os.path.basename(tiff_path)}")
+                except Exception as e:
+                    print(f"  Error deleting {tiff_path}: {e}")
+
+    def filter_images_in_parallel(self, executor, max_in_flight):
+        """Yield (image_info, valid_polygons) in image order, filtering images in the executor
+
+        At most max_in_flight images are submitted at a time and a new one is only
+        submitted once a result has been consumed, so results waiting for the
+        caller never pile up beyond that bound.
+        """
+        images = iter(self.images_info)
+        pending = deque((image_info, executor.submit(_filter_valid_polygons_worker, image_info))
+                        for image_info in itertools.islice(images, max_in_flight))
+
+        while pending:
+            image_info, future = pending.popleft()
+            valid_polygons = future.result()
+
+            next_image_info = next(images, None)
+            if next_image_info is not None:
+                pending.append((next_image_info, executor.submit(_filter_valid_polygons_worker, next_image_info)))
+
+            yield image_info, valid_polygons
+
+    def create_coco_dataset(self, output_path, convert_tiff_to_jpg=True, jpg_quality=100, num_workers=None):
+        """Create the complete COCO dataset
+
+        Annotations are streamed to output_path as they are created and are not
+        kept in memory. The returned dict holds the dataset header (info, licenses,
+        images, categories) and has no "annotations" key; load output_path for those.
+        """
         print("Loading images...")
         self.load_images()
 
@@ -304,67 +467,84 @@ class GeoTiffToCoco:
         self.load_csv()
 
         annotation_id = 1
-
-        # Process each image
-        for image_info in self.images_info:
-            print(f"Processing image {image_info['id']}: {image_info['filename']}")
-
-            # Filter polygons for this image
-            valid_polygons = self.filter_valid_polygons_for_image(image_info)
-
-            print(f"  Found {len(valid_polygons)} valid polygons for this image")
-
-            # Create annotations for this image
-            for polygon_data in valid_polygons:
-                coords = polygon_data['coords']
-                building_type = polygon_data['building']
-
-                bbox = self.get_bbox_from_coords(coords)
-                segmentation = self.get_segmentation_from_coords(coords)
-                area = self.calculate_area(coords)
-
-                annotation = {
-                    "id": annotation_id,
-                    "image_id": image_info['id'],
-                    "category_id": self.categories[building_type],
-                    "segmentation": segmentation,
-                    "area": area,
-                    "bbox": bbox,
-                    "iscrowd": 0
-                }
-
-                self.coco_format["annotations"].append(annotation)
-
-                # Save mapping information for later use
-                self.annotation_mapping.append({
-                    "annotation_id": annotation_id,
-                    "image_id": image_info['id'],
-                    "image_filename": image_info['filename'],
-                    "polygon_csv_idx": polygon_data['original_idx'],
-                    "category_name": building_type,
-                    "category_id": self.categories[building_type],
-                    "bbox": bbox,
-                    "area": area
-                })
-
-                annotation_id += 1
-
-        # Convert TIFF to JPG if requested
-        if convert_tiff_to_jpg:
-            self.convert_all_tiff_to_jpg(jpg_quality)
-
-        # Save the COCO dataset
-        with open(output_path, 'w') as f:
-            json.dump(self.coco_format, f, indent=2)
+        mapping_path = output_path.replace('.json', '_mapping.parquet')
+        # Explicit dtypes keep the Parquet schema the same even when no annotations are found
+        mapping_dtypes = {
+            "annotation_id": "int64",
+            "image_id": "int64",
+            "image_filename": "string",
+            "polygon_csv_idx": "int64",
+            "category_name": "string",
+            "category_id": "int64",
+            "bbox_x": "int64",
+            "bbox_y": "int64",
+            "bbox_width": "int64",
+            "bbox_height": "int64",
+            "area": "float64"
+        }
+        mapping = {column: [] for column in mapping_dtypes}
+
+        # Filter polygons for each image in parallel, results come back in image order
+        num_workers = num_workers or os.cpu_count()
+        print(f"Filtering polygons with {num_workers} worker processes...")
+        conversions = {}
+        with AnnotationWriter(output_path, self.coco_format) as writer:
+            with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                     initargs=(self,)) as executor:
+                image_results = self.filter_images_in_parallel(executor, max_in_flight=num_workers * 2)
+
+                # Process each image
+                for image_info, valid_polygons in image_results:
+                    print(f"Processing image {image_info['id']}: {image_info['filename']}")
+                    print(f"  Found {len(valid_polygons)} valid polygons for this image")
+
+                    # Create annotations for this image
+                    for polygon_data in valid_polygons:
+                        coords = polygon_data['coords']
+                        building_type = polygon_data['building']
+
+                        bbox = polygon_data['bbox']
+                        segmentation = self.get_segmentation_from_coords(coords)
+                        area = polygon_data['area']
+
+                        annotation = {
+                            "id": annotation_id,
+                            "image_id": image_info['id'],
+                            "category_id": self.categories[building_type],
+                            "segmentation": segmentation,
+                            "area": area,
+                            "bbox": bbox,
+                            "iscrowd": 0
+                        }
+
+                        writer.write(annotation)
+
+                        # Save mapping information for later use
+                        mapping["annotation_id"].append(annotation_id)
+                        mapping["image_id"].append(image_info['id'])
+                        mapping["image_filename"].append(image_info['filename'])
+                        mapping["polygon_csv_idx"].append(polygon_data['original_idx'])
+                        mapping["category_name"].append(building_type)
+                        mapping["category_id"].append(self.categories[building_type])
+                        mapping["bbox_x"].append(bbox[0])
+                        mapping["bbox_y"].append(bbox[1])
+                        mapping["bbox_width"].append(bbox[2])
+                        mapping["bbox_height"].append(bbox[3])
+                        mapping["area"].append(area)
+
+                        annotation_id += 1
+
+            # Convert TIFF to JPG if requested, before the writer emits the image entries
+            if convert_tiff_to_jpg:
+                conversions = self.convert_all_tiff_to_jpg(jpg_quality)
 
         # Save mapping information
-        mapping_path = output_path.replace('.json', '_mapping.json')
-        with open(mapping_path, 'w') as f:
-            json.dump(self.annotation_mapping, f, indent=2)
+        pd.DataFrame({column: pd.Series(values, dtype=mapping_dtypes[column])
+                      for column, values in mapping.items()}).to_parquet(mapping_path, index=False)
 
         print(f"\nCOCO dataset created successfully!")
         print(f"Total images: {len(self.coco_format['images'])}")
-        print(f"Total annotations: {len(self.coco_format['annotations'])}")
+        print(f"Total annotations: {writer.count}")
         print(f"Total categories: {len(self.coco_format['categories'])}")
         print(f"Saved to: {output_path}")
         print(f"Mapping saved to: {mapping_path}")
@@ -372,6 +552,10 @@ class GeoTiffToCoco:
         # Validate COCO structure
         self.validate_coco_structure(output_path)
 
+        # Only offer to delete the original TIFFs once the dataset is safely written
+        if conversions:
+            self.delete_original_tiffs(conversions)
+
         return self.coco_format
 
     def validate_coco_structure(self, coco_path):
@@ -399,11 +583,8 @@ class GeoTiffToCoco:
             print(f"✓ Categories: {len(cat_ids)}")
 
             # Check for orphaned annotations
-            orphaned_count = 0
-            for ann_id in ann_ids:
-                ann = coco.loadAnns([ann_id])[0]
-                if ann['image_id'] not in image_ids:
-                    orphaned_count += 1
+            image_id_set = set(image_ids)
+            orphaned_count = sum(1 for ann in coco.dataset['annotations'] if ann['image_id'] not in image_id_set)
 
             if orphaned_count > 0:
                 print(f"⚠ Warning: {orphaned_count} orphaned annotations found")
@@ -423,13 +604,15 @@ def main():
     parser.add_argument('--images', '-i', required=True,
                        help='Path to folder containing 640x640 images')
     parser.add_argument('--csv', '-c', required=True,
-                       help='Path to CSV file with OSM building data')
+                       help='Path to CSV (or GeoParquet/Feather) file with OSM building data')
     parser.add_argument('--output', '-o', required=True,
                        help='Output path for COCO JSON file')
     parser.add_argument('--quality', '-q', type=int, default=100,
                        help='JPG quality for TIFF conversion (1-100, default: 100)')
     parser.add_argument('--no-convert', action='store_true',
                        help='Skip TIFF to JPG conversion')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                       help='Number of worker processes for polygon filtering (default: CPU count)')
     parser.add_argument('--validate', action='store_true',
                        help='Validate COCO structure after creation')
 
@@ -448,6 +631,10 @@ def main():
         print("Error: Quality must be between 1 and 100")
         sys.exit(1)
 
+    if args.workers is not None and args.workers < 1:
+        print("Error: Workers must be at least 1")
+        sys.exit(1)
+
     # Create output directory if it doesn't exist
     output_dir = os.path.dirname(args.output)
     if output_dir and not os.path.exists(output_dir):
@@ -472,7 +659,8 @@ def main():
         coco_dataset = converter.create_coco_dataset(
             output_path=args.output,
             convert_tiff_to_jpg=not args.no_convert,
-            jpg_quality=args.quality
+            jpg_quality=args.quality,
+            num_workers=args.workers
         )
 
         print("\n" + "="*50)
@@ -482,3 +670,6 @@ def main():
     except Exception as e:
         print(f"\n❌ Error creating COCO dataset: {e}")
         sys.exit(1)
+
+if __name__ == "__main__":
+    main()